@@ -7,10 +7,11 @@ following KISS principles for simplicity and speed.
 import logging
 import subprocess
 import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Any, Tuple, List
+from typing import Any, Dict, List, Optional, Tuple
 
-from jinja2 import Environment, FileSystemLoader, Template
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
 from jinja2.exceptions import TemplateError
 
 try:
@@ -23,6 +24,9 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on rendered agent nodes kept per Generator
+RENDER_CACHE_SIZE = 256
+
 
 class GenerationError(Exception):
     """Raised when code generation fails."""
@@ -43,9 +47,11 @@ class Generator:
         if not template_dir.exists():
             raise GenerationError(f"Template directory does not exist: {template_dir}")
         
-        # Initialize Jinja environment
+        # Initialize Jinja environment; compiled templates are cached on disk
+        # (per-user temp dir, keyed by source checksum) so later runs skip parsing
         self.env = Environment(
             loader=FileSystemLoader(str(template_dir)),
+            bytecode_cache=FileSystemBytecodeCache(),
             trim_blocks=True,
             lstrip_blocks=True
         )
@@ -53,6 +59,12 @@ class Generator:
         # Add custom filters
         self.env.filters['classname'] = self._to_class_name
         
+        # Rendered agent nodes keyed by their template inputs (rendering is
+        # deterministic); LRU-bounded and dropped whenever Jinja reloads
+        # agent.py.j2 from disk
+        self._render_cache: "OrderedDict[tuple, str]" = OrderedDict()
+        self._render_template: Optional[Template] = None
+        
         logger.info(f"Generator initialized with templates from {template_dir}")
     
     @staticmethod
@@ -77,7 +89,29 @@ class Generator:
         """
         try:
             template = self.env.get_template("agent.py.j2")
-            
+        except TemplateError as e:
+            raise GenerationError(f"Failed to render agent template for '{agent_metadata.id}': {e}")
+        
+        # Jinja hands back a new Template object when the source changed on disk
+        if template is not self._render_template:
+            self._render_cache.clear()
+            self._render_template = template
+        
+        cache_key = (
+            agent_metadata.id,
+            agent_metadata.description,
+            tuple(agent_metadata.tools),
+            agent_metadata.memory_scope,
+            tuple((k, tuple(v)) for k, v in agent_metadata.wait_for.items()),
+            agent_metadata.parallel,
+            prompt_content,
+        )
+        cached = self._render_cache.get(cache_key)
+        if cached is not None:
+            self._render_cache.move_to_end(cache_key)
+            return cached
+        
+        try:
             # Prepare template context
             context = {
                 "agent": {
@@ -91,7 +125,11 @@ class Generator:
                 }
             }
             
-            return template.render(context)
+            rendered = template.render(context)
+            self._render_cache[cache_key] = rendered
+            if len(self._render_cache) > RENDER_CACHE_SIZE:
+                self._render_cache.popitem(last=False)
+            return rendered
             
         except TemplateError as e:
             raise GenerationError(f"Failed to render agent template for '{agent_metadata.id}': {e}")
@@ -170,25 +208,35 @@ class Generator:
         if not file_paths:
             return issues
         
-        # Run black formatter
+        # Run black formatter (in-process when importable, avoiding a process spawn).
+        # Imported here rather than at module level: black costs ~100ms to import
+        # and is a dev dependency, so the CLI is the fallback without it
         try:
-            result = subprocess.run(
-                ["black", "--quiet"] + [str(p) for p in file_paths],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            if result.returncode != 0:
-                issues.append(f"Black formatting failed: {result.stderr}")
-                logger.warning(f"Black formatting issues: {result.stderr}")
-            else:
-                logger.info(f"Black formatting completed successfully")
-        except subprocess.TimeoutExpired:
-            issues.append("Black formatting timed out")
-        except FileNotFoundError:
-            issues.append("Black not found - install with 'pip install black'")
-        except Exception as e:
-            issues.append(f"Black formatting error: {e}")
+            import black
+        except ImportError:
+            black = None
+        
+        if black is not None:
+            issues.extend(self._format_with_black(black, file_paths))
+        else:
+            try:
+                result = subprocess.run(
+                    ["black", "--quiet"] + [str(p) for p in file_paths],
+                    capture_output=True,
+                    text=True,
+                    timeout=30
+                )
+                if result.returncode != 0:
+                    issues.append(f"Black formatting failed: {result.stderr}")
+                    logger.warning(f"Black formatting issues: {result.stderr}")
+                else:
+                    logger.info(f"Black formatting completed successfully")
+            except subprocess.TimeoutExpired:
+                issues.append("Black formatting timed out")
+            except FileNotFoundError:
+                issues.append("Black not found - install with 'pip install black'")
+            except Exception as e:
+                issues.append(f"Black formatting error: {e}")
         
         # Run ruff linter
         try:
@@ -212,8 +260,77 @@ class Generator:
         
         return issues
     
+    @staticmethod
+    def _black_mode(black: Any, file_paths: List[Path]) -> Any:
+        """Build a black Mode from the [tool.black] settings the CLI would use.
+        
+        Args:
+            black: The imported black module
+            file_paths: Files being formatted (the pyproject.toml search starts here)
+            
+        Returns:
+            black.Mode for the nearest pyproject.toml, or black's defaults
+        """
+        pyproject = black.find_pyproject_toml(tuple(str(p) for p in file_paths))
+        if not pyproject:
+            return black.Mode()
+        
+        config = black.parse_pyproject_toml(pyproject)
+        return black.Mode(
+            target_versions={
+                black.TargetVersion[version.upper()]
+                for version in config.get("target_version", [])
+            },
+            line_length=config.get("line_length", black.DEFAULT_LINE_LENGTH),
+            string_normalization=not config.get("skip_string_normalization", False),
+            magic_trailing_comma=not config.get("skip_magic_trailing_comma", False),
+            preview=config.get("preview", False),
+        )
+    
+    @classmethod
+    def _format_with_black(cls, black: Any, file_paths: List[Path]) -> List[str]:
+        """Format files in place using black's Python API.
+        
+        Args:
+            black: The imported black module
+            file_paths: List of Python files to format
+            
+        Returns:
+            List of formatting issues (empty if all good)
+        """
+        issues = []
+        try:
+            mode = cls._black_mode(black, file_paths)
+        except Exception as e:
+            return [f"Black configuration error: {e}"]
+        
+        for path in file_paths:
+            try:
+                black.format_file_in_place(
+                    Path(path), fast=False, mode=mode, write_back=black.WriteBack.YES
+                )
+            except Exception as e:
+                issues.append(f"Black formatting failed: {path}: {e}")
+                logger.warning(f"Black formatting issues in {path}: {e}")
+        
+        if not issues:
+            logger.info("Black formatting completed successfully")
+        
+        return issues
+    
+    @staticmethod
+    def _write_files(files: Dict[Path, str]) -> None:
+        """Write rendered files to disk.
+        
+        Args:
+            files: Dictionary mapping file paths to content
+        """
+        for path, content in files.items():
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(content)
+    
     def generate_all(self, agents: Dict[str, Tuple[AgentMetadata, str]], 
-                    output_dir: Path, format_code: bool = True) -> Dict[str, str]:
+                    output_dir: Path, format_code: bool = True) -> Dict[Path, str]:
         """Generate all Python files from templates.
         
         Args:
@@ -228,7 +345,7 @@ class Generator:
             GenerationError: If generation fails
         """
         start_time = time.time()
-        generated_files = {}
+        generated_files: Dict[Path, str] = {}
         
         try:
             # Create output directory structure
@@ -236,45 +353,34 @@ class Generator:
             agents_dir = output_dir / "agents"
             agents_dir.mkdir(exist_ok=True)
             
-            # Generate individual agent files
+            # Render individual agent files
             for agent_id, (metadata, prompt_content) in agents.items():
                 agent_code = self.render_agent_node(metadata, prompt_content)
                 agent_file = agents_dir / f"{agent_id}.py"
-                generated_files[str(agent_file)] = agent_code
-                
-                # Write to file
-                with open(agent_file, 'w', encoding='utf-8') as f:
-                    f.write(agent_code)
+                generated_files[agent_file] = agent_code
                 
                 logger.debug(f"Generated agent file: {agent_file}")
             
-            # Generate FastAPI app
-            app_code = self.render_fastapi_app(agents)
+            # Render FastAPI app
             app_file = output_dir / "app.py"
-            generated_files[str(app_file)] = app_code
+            generated_files[app_file] = self.render_fastapi_app(agents)
             
-            with open(app_file, 'w', encoding='utf-8') as f:
-                f.write(app_code)
-            
-            # Generate utils
-            utils_code = self.render_utils()
+            # Render utils
             utils_file = output_dir / "utils.py"
-            generated_files[str(utils_file)] = utils_code
-            
-            with open(utils_file, 'w', encoding='utf-8') as f:
-                f.write(utils_code)
+            generated_files[utils_file] = self.render_utils()
             
-            # Generate agents __init__.py
-            init_code = self.render_agents_init(agents)
+            # Render agents __init__.py
             init_file = agents_dir / "__init__.py"
-            generated_files[str(init_file)] = init_code
+            generated_files[init_file] = self.render_agents_init(agents)
             
-            with open(init_file, 'w', encoding='utf-8') as f:
-                f.write(init_code)
+            # Write all files once rendering has succeeded
+            self._write_files(generated_files)
             
             # Format generated code if requested
             if format_code:
-                python_files = [Path(path) for path in generated_files.keys() if path.endswith('.py')]
+                python_files = [
+                    path for path in generated_files if path.suffix == '.py'
+                ]
                 formatting_issues = self.format_code(python_files)
                 
                 if formatting_issues:
@@ -294,7 +400,7 @@ class Generator:
 
 
 def generate_from_config(config: Dict[str, Any], output_dir: Path, 
-                        template_dir: Path) -> Dict[str, str]:
+                        template_dir: Path) -> Dict[Path, str]:
     """High-level function to generate code from merged configuration.
     
     Args:
@@ -320,6 +426,7 @@ def generate_from_config(config: Dict[str, Any], output_dir: Path,
 def main():
     """CLI entry point for testing the generator."""
     import sys
+
     from .parser import parse_agents_directory
     
     if len(sys.argv) != 3:
@@ -4,16 +4,43 @@ This module handles parsing BMAD Markdown files and extracting agent metadata
 from YAML front-matter, following the KISS principle for simplicity.
 """
 
+import asyncio
+import copy
+import functools
 import logging
+import mmap
+import os
+import re
+import stat
+import sys
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 
 import yaml
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, Field, field_validator
+
+try:
+    # libyaml-backed loader: same safe semantics, C tokenizer
+    from yaml import CSafeLoader as _SafeLoader
+    YAML_BACKEND = "libyaml"
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader
+    YAML_BACKEND = "python"
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Fixed memory scopes (plus any 'shared:<namespace>')
+_MEMORY_SCOPES = frozenset({"isolated", "shared"})
+
+# Agent files at least this large are decoded from an mmap rather than read()
+_MMAP_MIN_SIZE = 64 * 1024
+
+
+def _default_wait_for() -> Dict[str, List[str]]:
+    """Fresh, empty wait_for mapping for each AgentMetadata."""
+    return {"docs": [], "agents": []}
+
 
 class AgentMetadata(BaseModel):
     """Agent metadata model with validation for both v1.0 and v2.0 formats."""
@@ -32,7 +59,8 @@ class AgentMetadata(BaseModel):
     # Execution configuration
     tools: List[str] = []
     memory_scope: str = "isolated"
-    wait_for: Dict[str, List[str]] = {"docs": [], "agents": []}
+    # A factory builds the fresh dict directly; a literal default is deep-copied
+    wait_for: Dict[str, List[str]] = Field(default_factory=_default_wait_for)
     parallel: bool = False
     
     # Format version detection
@@ -41,16 +69,26 @@ class AgentMetadata(BaseModel):
     @field_validator("memory_scope")
     def validate_memory_scope(cls, v):
         """Validate memory scope is either 'isolated' or 'shared' or 'shared:namespace'."""
-        if isinstance(v, str) and (v == "isolated" or v == "shared" or v.startswith("shared:")):
-            return v
+        if isinstance(v, str) and (v in _MEMORY_SCOPES or v.startswith("shared:")):
+            # Interned: a handful of distinct values repeated across every agent
+            return sys.intern(v)
         raise ValueError("memory_scope must be 'isolated', 'shared', or 'shared:namespace'")
 
+    @field_validator("tools")
+    def intern_tools(cls, v):
+        """Intern tool names so agents sharing a tool share one string."""
+        return [sys.intern(tool) for tool in v]
+
     @field_validator("id")
     def validate_id(cls, v):
         """Validate id is not empty."""
-        if not v or not v.strip():
+        # Common case: already-clean ids skip the strip() copies entirely
+        if v and not v[0].isspace() and not v[-1].isspace():
+            return v
+        v = v.strip()
+        if not v:
             raise ValueError("Agent id is required and cannot be empty")
-        return v.strip()
+        return v
     
     @field_validator("format_version")
     def validate_format_version(cls, v):
@@ -72,12 +110,73 @@ class ParsingError(Exception):
     def __init__(self, file: str, message: str, line: Optional[int] = None):
         self.file = file
         self.line = line
+        self.message = message
         if line:
             super().__init__(f"{file}:{line}: {message}")
         else:
             super().__init__(f"{file}: {message}")
 
 
+# Closing front-matter delimiter: a whole line of "---" (surrounding blanks allowed)
+_FM_CLOSE_RE = re.compile(r"^[^\S\n]*---[^\S\n]*$", re.MULTILINE)
+
+# Restricted YAML subset handled without PyYAML: top-level "key: value" lines
+# whose values are plain words or flow lists of plain words.
+_SIMPLE_LINE_RE = re.compile(r"([A-Za-z_][A-Za-z0-9_-]*): +(.+)")
+_PLAIN_SCALAR_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_ ./-]*")
+_YAML_BOOLS = {"true": True, "True": True, "TRUE": True,
+               "false": False, "False": False, "FALSE": False}
+# Plain words PyYAML would resolve to something other than a string
+_YAML_KEYWORDS = frozenset({
+    "yes", "Yes", "YES", "no", "No", "NO", "on", "On", "ON", "off", "Off", "OFF",
+    "null", "Null", "NULL",
+})
+
+
+def _parse_plain_scalar(token: str) -> Any:
+    """Return the value of a plain YAML word, or raise ValueError if not simple."""
+    if token in _YAML_BOOLS:
+        return _YAML_BOOLS[token]
+    if token in _YAML_KEYWORDS or not _PLAIN_SCALAR_RE.fullmatch(token):
+        raise ValueError(token)
+    return token
+
+
+def _parse_simple_yaml(yaml_content: str) -> Optional[Dict[str, Any]]:
+    """Parse front matter in the restricted subset, or None to defer to PyYAML."""
+    metadata: Dict[str, Any] = {}
+    try:
+        for line in yaml_content.split("\n"):
+            line = line.rstrip()
+            if not line:
+                continue
+            match = _SIMPLE_LINE_RE.fullmatch(line)
+            if match is None:
+                return None
+            key, value = match.groups()
+            # Keys resolve like values (`on:` is the key True), so defer those too
+            if key in _YAML_BOOLS or key in _YAML_KEYWORDS:
+                return None
+            if value[0] == "[" and value[-1] == "]":
+                inner = value[1:-1].strip()
+                metadata[key] = [_parse_plain_scalar(item.strip())
+                                 for item in inner.split(",")] if inner else []
+            else:
+                metadata[key] = _parse_plain_scalar(value)
+    except ValueError:
+        return None
+    return metadata
+
+
+@functools.lru_cache(maxsize=2048)
+def _load_yaml(yaml_content: str) -> Dict[str, Any]:
+    """Load a front-matter block; cached, so callers must not mutate the result."""
+    metadata = _parse_simple_yaml(yaml_content)
+    if metadata is not None:
+        return metadata
+    return yaml.load(yaml_content, Loader=_SafeLoader) or {}
+
+
 def parse_front_matter(content: str) -> tuple[Dict[str, Any], str]:
     """Parse YAML front matter from Markdown content.
 
@@ -90,74 +189,95 @@ def parse_front_matter(content: str) -> tuple[Dict[str, Any], str]:
     Raises:
         ParsingError: If YAML parsing fails.
     """
-    content = content.strip()
+    # Work on the stripped bounds instead of a stripped copy, so the (possibly
+    # large) Markdown body is copied exactly once, by the final slice
+    start, end = 0, len(content)
+    while start < end and content[start].isspace():
+        start += 1
+    while end > start and content[end - 1].isspace():
+        end -= 1
 
     # Check if content starts with front matter delimiter
-    if not content.startswith("---"):
-        return {}, content
+    if not content.startswith("---", start, end):
+        return {}, content[start:end]
 
     try:
-        # Find the closing delimiter
-        lines = content.split("\n")
-        end_delimiter_index = -1
+        # Find the closing delimiter: the first later line that is just "---"
+        first_newline = content.find("\n", start, end)
+        match = (_FM_CLOSE_RE.search(content, first_newline + 1, end)
+                 if first_newline != -1 else None)
 
-        for i, line in enumerate(lines[1:], 1):  # Skip first line (opening ---)
-            if line.strip() == "---":
-                end_delimiter_index = i
-                break
-
-        if end_delimiter_index == -1:
+        if match is None:
             # No closing delimiter found, treat as no front matter
-            return {}, content
-
-        # Extract YAML content between delimiters
-        yaml_lines = lines[1:end_delimiter_index]
-        yaml_content = "\n".join(yaml_lines)
+            return {}, content[start:end]
 
-        # Parse YAML safely
-        metadata = yaml.safe_load(yaml_content) or {}
+        # Extract YAML content between delimiters (excluding the newline before "---")
+        yaml_start = first_newline + 1
+        yaml_content = content[yaml_start:max(yaml_start, match.start() - 1)]
 
-        # Extract remaining Markdown content
-        remaining_lines = lines[end_delimiter_index + 1 :]
-        remaining_content = "\n".join(remaining_lines)
+        # Parse YAML safely (deep-copied so callers can modify the cached result)
+        metadata = copy.deepcopy(_load_yaml(yaml_content))
 
-        # Strip leading newline if present
-        if remaining_content.startswith("\n"):
-            remaining_content = remaining_content[1:]
+        # Remaining Markdown starts after the closing line's newline, minus one
+        # leading blank line if present
+        body_start = match.end() + 1
+        if content.startswith("\n", body_start, end):
+            body_start += 1
 
-        return metadata, remaining_content
+        return metadata, content[body_start:end]
 
     except yaml.YAMLError as e:
-        raise ParsingError("", f"Invalid YAML in front matter: {e}")
+        raise ParsingError("", f"Invalid YAML in front matter: {e}") from e
 
 
-def parse_markdown_file(file_path: Path) -> tuple[AgentMetadata, str]:
-    """Parse a single BMAD Markdown file.
+# Diagnostics for the front-matter YAML cache
+parse_front_matter.cache_info = _load_yaml.cache_info
+parse_front_matter.cache_clear = _load_yaml.cache_clear
+
+
+def _read_fd(fd: int, size: int) -> bytes:
+    """Read size bytes from fd with raw os calls (no buffered/text wrapper)."""
+    data = os.read(fd, size)
+    # Regular files rarely short-read, but finish the job if they do
+    while len(data) < size:
+        chunk = os.read(fd, size - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+def parse_markdown_source(
+    source: Union[str, bytes, mmap.mmap],
+    default_id: str,
+    source_name: Optional[str] = None,
+) -> tuple[AgentMetadata, str]:
+    """Parse BMAD Markdown content that is already in memory.
 
     Args:
-        file_path: Path to the Markdown file.
+        source: Markdown content (str, or a UTF-8 encoded bytes-like object).
+        default_id: Agent id to use when the front matter does not set one.
+        source_name: Name used in error messages (defaults to default_id).
 
     Returns:
         Tuple of (agent_metadata, prompt_content).
 
     Raises:
-        ParsingError: If file cannot be read or parsed.
+        ParsingError: If the content cannot be parsed or validated.
     """
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            content = f.read()
-    except IOError as e:
-        raise ParsingError(str(file_path), f"Cannot read file: {e}")
+    source_name = source_name or default_id
 
     try:
+        if not isinstance(source, str):
+            # Raw reads skip open()'s universal newlines, so translate here
+            source = str(source, "utf-8").replace("\r\n", "\n").replace("\r", "\n")
+
         # Extract front matter and content
-        metadata_dict, prompt_content = parse_front_matter(content)
+        metadata_dict, prompt_content = parse_front_matter(source)
 
-        # If no id in metadata and no front matter, use filename as id
-        if not metadata_dict and file_path.stem != file_path.name:
-            metadata_dict = {"id": file_path.stem}
-        elif not metadata_dict.get("id"):
-            metadata_dict["id"] = file_path.stem
+        # If no id in metadata, fall back to the default (the filename for files)
+        if not metadata_dict.get("id"):
+            metadata_dict["id"] = default_id
 
         # Auto-detect format version if not specified
         if "format_version" not in metadata_dict:
@@ -170,8 +290,125 @@ def parse_markdown_file(file_path: Path) -> tuple[AgentMetadata, str]:
 
         return metadata, prompt_content
 
+    except ParsingError as e:
+        # parse_front_matter has no file context; re-label with this source
+        raise ParsingError(source_name, f"Parsing failed: {e.message}") from e.__cause__
     except (yaml.YAMLError, ValueError) as e:
-        raise ParsingError(str(file_path), f"Parsing failed: {e}")
+        raise ParsingError(source_name, f"Parsing failed: {e}") from e
+
+
+def _parse_agent_file(path: str, default_id: str) -> tuple[AgentMetadata, str]:
+    """Read and parse one agent file.
+
+    Files of at least _MMAP_MIN_SIZE bytes are mapped and decoded straight from
+    the page cache, skipping the intermediate bytes copy of a plain read.
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            size = os.fstat(fd).st_size
+            if size >= _MMAP_MIN_SIZE:
+                source = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+            else:
+                source = _read_fd(fd, size)
+        finally:
+            # mmap holds its own reference to the file
+            os.close(fd)
+    except OSError as e:
+        raise ParsingError(path, f"Cannot read file: {e}")
+
+    try:
+        return parse_markdown_source(source, default_id, path)
+    finally:
+        if isinstance(source, mmap.mmap):
+            source.close()
+
+
+def parse_markdown_file(file_path: Path) -> tuple[AgentMetadata, str]:
+    """Parse a single BMAD Markdown file.
+
+    Args:
+        file_path: Path to the Markdown file.
+
+    Returns:
+        Tuple of (agent_metadata, prompt_content).
+
+    Raises:
+        ParsingError: If file cannot be read or parsed.
+    """
+    return _parse_agent_file(str(file_path), file_path.stem)
+
+
+def _parse_directory_entry(
+    entry: os.DirEntry,
+) -> tuple[Optional[tuple[AgentMetadata, str]], Optional[ParsingError]]:
+    """Read and parse one agent file, returning (result, None) or (None, error)."""
+    try:
+        return _parse_agent_file(entry.path, entry.name[:-len(".md")]), None
+    except ParsingError as e:
+        return None, e
+
+
+def _list_agent_files(directory_path: Path) -> List[os.DirEntry]:
+    """Return the directory's .md file entries, sorted by name.
+
+    Raises:
+        ParsingError: If the path is missing, not a directory, or unreadable.
+    """
+    # One stat answers both "exists?" and "is it a directory?"
+    try:
+        mode = os.stat(directory_path).st_mode
+    except (FileNotFoundError, NotADirectoryError):
+        raise ParsingError(str(directory_path), "Directory does not exist")
+
+    if not stat.S_ISDIR(mode):
+        raise ParsingError(str(directory_path), "Path is not a directory")
+
+    try:
+        # scandir's d_type answers is_file() without a stat, and sorting by
+        # name keeps duplicate-id resolution deterministic
+        with os.scandir(directory_path) as entries:
+            return sorted(
+                (entry for entry in entries
+                 if entry.name.endswith(".md") and entry.is_file()),
+                key=lambda entry: entry.name,
+            )
+    except OSError as e:
+        raise ParsingError(str(directory_path), f"Error scanning directory: {e}")
+
+
+def _merge_agents(
+    md_files: List[os.DirEntry],
+    results: List[tuple[Optional[tuple[AgentMetadata, str]], Optional[ParsingError]]],
+) -> Dict[str, tuple[AgentMetadata, str]]:
+    """Combine per-file parse results into the agents dict, logging failures."""
+    # Collect (id, result) pairs in name order; dict() then sizes the table
+    # once and keeps the last file for a duplicate id, as before
+    pairs = []
+    sources = []
+    for entry, (parsed, error) in zip(md_files, results):
+        if error is not None:
+            logger.error(f"Failed to parse {entry.path}: {error}")
+            # Continue with other files instead of failing completely
+            continue
+
+        pairs.append((parsed[0].id, parsed))
+        sources.append(entry)
+        logger.info(f"Parsed agent '{parsed[0].id}' from {entry.name}")
+
+    agents = dict(pairs)
+
+    # Check for duplicate IDs (only walk the pairs again when there are any)
+    if len(agents) != len(pairs):
+        seen = set()
+        for (agent_id, _), entry in zip(pairs, sources):
+            if agent_id in seen:
+                logger.warning(
+                    f"Duplicate agent ID '{agent_id}' found in {entry.path}"
+                )
+            seen.add(agent_id)
+
+    return agents
 
 
 def parse_agents_directory(
@@ -188,44 +425,79 @@ def parse_agents_directory(
     Raises:
         ParsingError: If directory cannot be read or files cannot be parsed.
     """
-    if not directory_path.exists():
-        raise ParsingError(str(directory_path), "Directory does not exist")
+    md_files = _list_agent_files(directory_path)
 
-    if not directory_path.is_dir():
-        raise ParsingError(str(directory_path), "Path is not a directory")
-
-    agents = {}
+    if not md_files:
+        logger.warning(f"No .md files found in {directory_path}")
+        return {}
 
     try:
-        # Find all .md files
-        md_files = list(directory_path.glob("*.md"))
+        # Parsing is CPU-bound Python (YAML and pydantic hold the GIL), so a
+        # plain loop beats a thread pool here
+        results = [_parse_directory_entry(entry) for entry in md_files]
 
-        if not md_files:
-            logger.warning(f"No .md files found in {directory_path}")
-            return agents
+        return _merge_agents(md_files, results)
 
-        for file_path in md_files:
-            try:
-                metadata, prompt_content = parse_markdown_file(file_path)
+    except Exception as e:
+        raise ParsingError(str(directory_path), f"Error scanning directory: {e}")
 
-                # Check for duplicate IDs
-                if metadata.id in agents:
-                    logger.warning(
-                        f"Duplicate agent ID '{metadata.id}' found in {file_path}"
-                    )
 
-                agents[metadata.id] = (metadata, prompt_content)
-                logger.info(f"Parsed agent '{metadata.id}' from {file_path.name}")
+def _read_agent_bytes(path: str) -> bytes:
+    """Read a whole agent file, reporting failures as ParsingError."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            return _read_fd(fd, os.fstat(fd).st_size)
+        finally:
+            os.close(fd)
+    except OSError as e:
+        raise ParsingError(path, f"Cannot read file: {e}")
 
-            except ParsingError as e:
-                logger.error(f"Failed to parse {file_path}: {e}")
-                # Continue with other files instead of failing completely
-                continue
 
-    except Exception as e:
-        raise ParsingError(str(directory_path), f"Error scanning directory: {e}")
+async def parse_agents_directory_async(
+    directory_path: Path,
+) -> Dict[str, tuple[AgentMetadata, str]]:
+    """Parse all .md files in the agents directory, overlapping the file reads.
 
-    return agents
+    All reads are issued concurrently on worker threads (useful on slow or
+    network storage); parsing and validation then run on the event loop.
+
+    Args:
+        directory_path: Path to directory containing agent .md files.
+
+    Returns:
+        Dictionary mapping agent_id to (metadata, prompt_content).
+
+    Raises:
+        ParsingError: If directory cannot be read.
+    """
+    md_files = await asyncio.to_thread(_list_agent_files, directory_path)
+
+    if not md_files:
+        logger.warning(f"No .md files found in {directory_path}")
+        return {}
+
+    contents = await asyncio.gather(
+        *(asyncio.to_thread(_read_agent_bytes, entry.path) for entry in md_files),
+        return_exceptions=True,
+    )
+
+    results = []
+    for entry, content in zip(md_files, contents):
+        if isinstance(content, ParsingError):
+            results.append((None, content))
+            continue
+        if isinstance(content, BaseException):
+            raise content
+        try:
+            parsed = parse_markdown_source(
+                content, entry.name[:-len(".md")], entry.path
+            )
+            results.append((parsed, None))
+        except ParsingError as e:
+            results.append((None, e))
+
+    return _merge_agents(md_files, results)
 
 
 # Main entry point for CLI usage
@@ -65,7 +65,7 @@ def test_end_to_end_generation():
             print(f"   Generated {len(generated_files)} files:")
             
             for file_path in sorted(generated_files.keys()):
-                rel_path = Path(file_path).relative_to(output_dir)
+                rel_path = file_path.relative_to(output_dir)
                 print(f"     - {rel_path}")
             
             # Step 4: Validate generated files
@@ -73,12 +73,12 @@ def test_end_to_end_generation():
             
             import ast
             for file_path, content in generated_files.items():
-                if file_path.endswith('.py'):
+                if file_path.suffix == '.py':
                     try:
                         ast.parse(content)
-                        print(f"     OK {Path(file_path).name} - valid Python syntax")
+                        print(f"     OK {file_path.name} - valid Python syntax")
                     except SyntaxError as e:
-                        print(f"     ERROR {Path(file_path).name} - syntax error: {e}")
+                        print(f"     ERROR {file_path.name} - syntax error: {e}")
                         return False
             
             # Step 5: Performance check
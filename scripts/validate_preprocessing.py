@@ -5,24 +5,33 @@ helpful error messages with correction suggestions.
 """
 
 import argparse
+import functools
 import json
 import logging
 import sys
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import Any, Dict, List, Optional
 
 import jsonschema
 import yaml
 from jsonschema import ValidationError
+from jsonschema.exceptions import best_match
 
 try:
-    from .parser import parse_agents_directory, parse_markdown_file, ParsingError
+    from .parser import ParsingError, parse_agents_directory, parse_markdown_file
 except ImportError:
-    from parser import parse_agents_directory, parse_markdown_file, ParsingError
+    from parser import ParsingError, parse_agents_directory, parse_markdown_file
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Compiled validators keyed by id(schema), least recently used first; each
+# entry keeps its schema alive so the id cannot be reused while cached.
+# Bounded so callers passing many distinct schemas don't grow it forever.
+_VALIDATOR_CACHE_SIZE = 64
+_VALIDATOR_CACHE: "OrderedDict[int, tuple]" = OrderedDict()
+
 
 class ValidationResult:
     """Result of validation operation."""
@@ -33,8 +42,14 @@ class ValidationResult:
         self.warnings = warnings or []
 
 
+@functools.lru_cache(maxsize=8)
 def load_schema(version: str = "2.0") -> Dict[str, Any]:
-    """Load JSON schema for specified version."""
+    """Load JSON schema for specified version.
+    
+    The schema is read once per version and the same dict is returned on
+    every call (which also keeps the compiled validator cache warm), so
+    callers must treat it as read-only.
+    """
     # Map version to file name
     version_map = {"1.0": "1", "2.0": "2"}
     version_suffix = version_map.get(version, version.replace(".", ""))
@@ -47,13 +62,37 @@ def load_schema(version: str = "2.0") -> Dict[str, Any]:
         return json.load(f)
 
 
+def _get_validator(schema: Dict[str, Any]):
+    """Return a compiled validator for schema, building and checking it once."""
+    key = id(schema)
+    cached = _VALIDATOR_CACHE.get(key)
+    if cached is not None and cached[0] is schema:
+        _VALIDATOR_CACHE.move_to_end(key)
+        return cached[1]
+    
+    # Same draft selection and schema check as jsonschema.validate()
+    validator_cls = jsonschema.validators.validator_for(schema)
+    validator_cls.check_schema(schema)
+    validator = validator_cls(schema)
+    
+    _VALIDATOR_CACHE[key] = (schema, validator)
+    _VALIDATOR_CACHE.move_to_end(key)
+    if len(_VALIDATOR_CACHE) > _VALIDATOR_CACHE_SIZE:
+        _VALIDATOR_CACHE.popitem(last=False)
+    return validator
+
+
 def validate_against_schema(metadata: Dict[str, Any], schema: Dict[str, Any]) -> ValidationResult:
     """Validate metadata against JSON schema."""
     errors = []
     warnings = []
     
     try:
-        jsonschema.validate(instance=metadata, schema=schema)
+        # Reuse the compiled validator; best_match picks the same error
+        # jsonschema.validate() would raise
+        error = best_match(_get_validator(schema).iter_errors(metadata))
+        if error is not None:
+            raise error
         return ValidationResult(success=True, errors=[], warnings=warnings)
     
     except ValidationError as e:
@@ -0,0 +1,117 @@
+"""Shared fixtures for unit tests."""
+
+import functools
+import re
+from pathlib import Path
+
+import pytest
+
+from scripts.generator import Generator
+from scripts.parser import AgentMetadata
+
+try:
+    import ahocorasick
+except ImportError:
+    # Optional; pattern checks fall back to a regex alternation without it
+    ahocorasick = None
+
+# Resolved once at import rather than in each fixture call
+TEMPLATE_DIR = Path(__file__).resolve().parents[2] / "scripts" / "templates"
+
+
+@pytest.fixture(scope="session")
+def generator():
+    """Generator shared across the session; builds the Jinja environment once."""
+    return Generator(TEMPLATE_DIR)
+
+
+@pytest.fixture(scope="session")
+def render(generator):
+    """Render an agent node, memoized on the metadata fields and prompt.
+
+    Tests that render equivalent agents within a session get the cached
+    output instead of running the template again.
+    """
+    @functools.lru_cache(maxsize=256)
+    def _render(key):
+        agent_id, description, tools, memory_scope, docs, agents, parallel, prompt = key
+        metadata = AgentMetadata(
+            id=agent_id,
+            description=description,
+            tools=list(tools),
+            memory_scope=memory_scope,
+            wait_for={"docs": list(docs), "agents": list(agents)},
+            parallel=parallel
+        )
+        return generator.render_agent_node(metadata, prompt)
+
+    def render_agent(metadata, prompt_content):
+        return _render((
+            metadata.id,
+            metadata.description,
+            tuple(metadata.tools),
+            metadata.memory_scope,
+            tuple(metadata.wait_for.get("docs", ())),
+            tuple(metadata.wait_for.get("agents", ())),
+            metadata.parallel,
+            prompt_content,
+        ))
+
+    return render_agent
+
+
+@functools.lru_cache(maxsize=None)
+def _pattern_scanner(patterns):
+    """Build (once per pattern tuple) a function returning a bitmask of patterns found.
+
+    Bit ``i`` is set when ``patterns[i]`` occurs in the scanned code.
+    """
+    pattern_idx = {p: i for i, p in enumerate(patterns)}
+
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for pattern, idx in pattern_idx.items():
+            automaton.add_word(pattern, 1 << idx)
+        automaton.make_automaton()
+
+        # Aho-Corasick reports overlapping matches too, so the mask is exact
+        def scan(code):
+            seen = 0
+            for _, bit in automaton.iter(code):
+                seen |= bit
+            return seen
+
+        return scan
+
+    rx = re.compile("|".join(re.escape(p) for p in sorted(patterns, key=len, reverse=True)))
+
+    def scan(code):
+        seen = 0
+        for match in rx.findall(code):
+            seen |= 1 << pattern_idx[match]
+        # Patterns overlapped by a longer match (e.g. "Node" inside
+        # "AsyncNode") may go unreported, so re-check only those with ``in``
+        for pattern, idx in pattern_idx.items():
+            if not seen >> idx & 1 and pattern in code:
+                seen |= 1 << idx
+        return seen
+
+    return scan
+
+
+def _assert_all_in(code, patterns):
+    """Assert every pattern occurs in code, scanning it once.
+
+    All missing patterns are reported together.
+    """
+    patterns = tuple(dict.fromkeys(patterns))  # one bit per distinct pattern
+    seen = _pattern_scanner(patterns)(code)
+    if seen != (1 << len(patterns)) - 1:
+        missing = [p for i, p in enumerate(patterns) if not seen >> i & 1]
+        raise AssertionError(f"Missing required patterns: {missing}")
+
+
+@pytest.fixture(scope="session")
+def assert_all_in():
+    """Multi-pattern containment assertion (see _assert_all_in)."""
+    return _assert_all_in
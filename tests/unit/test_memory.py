@@ -1,20 +1,41 @@
 """Comprehensive unit tests for memory storage system."""
 
 import asyncio
-import json
+import os
 import pytest
 from pathlib import Path
-from tempfile import TemporaryDirectory
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
 
 from generated.memory import MemoryManager
 
+try:
+    from orjson import loads as _loads
+except ImportError:
+    from json import loads as _loads
+
+
+def _read_lines(path):
+    """Read a JSONL file with a single os.read and return its lines."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.read(fd, os.fstat(fd).st_size).decode().splitlines()
+    finally:
+        os.close(fd)
+
+
+@pytest.fixture(scope="session")
+def memory_root(tmp_path_factory):
+    """Session-wide scratch root; pytest cleans it up with its other tmp dirs."""
+    return tmp_path_factory.mktemp("memory")
+
 
 @pytest.fixture
-def temp_memory_dir():
-    """Create a temporary directory for memory tests."""
-    with TemporaryDirectory() as tmp_dir:
-        yield tmp_dir
+def temp_memory_dir(memory_root):
+    """Create a fresh, isolated memory directory under the session root."""
+    tmp_dir = memory_root / uuid4().hex
+    tmp_dir.mkdir()
+    return str(tmp_dir)
 
 
 @pytest.fixture
@@ -23,9 +44,18 @@ def memory_manager(temp_memory_dir):
     return MemoryManager(memory_dir=temp_memory_dir)
 
 
-@pytest.mark.asyncio
+@pytest.fixture(scope="module")
+def large_payload():
+    """Large nested payload, built once per module (treat as read-only)."""
+    return {
+        "items": [f"item_{i}" for i in range(1000)],
+        "metadata": {f"key_{i}": f"value_{i}" for i in range(100)}
+    }
+
+
+@pytest.mark.asyncio(loop_scope="class")
 class TestMemoryManager:
-    """Test MemoryManager functionality."""
+    """Test MemoryManager functionality (all tests share one event loop)."""
     
     async def test_isolated_scope_basic_operations(self, memory_manager):
         """Test basic get/set operations for isolated scope."""
@@ -98,17 +128,13 @@ class TestMemoryManager:
         assert shared_file.exists()
         
         # Verify file contents
-        with open(isolated_file, 'r') as f:
-            line = f.readline().strip()
-            entry = json.loads(line)
-            assert entry["key"] == "agent1:story1"
-            assert entry["value"] == {"persistent": "data"}
-        
-        with open(shared_file, 'r') as f:
-            line = f.readline().strip()
-            entry = json.loads(line)
-            assert entry["key"] == "global"
-            assert entry["value"] == {"global": "data"}
+        entry = _loads(isolated_file.read_bytes().splitlines()[0])
+        assert entry["key"] == "agent1:story1"
+        assert entry["value"] == {"persistent": "data"}
+        
+        entry = _loads(shared_file.read_bytes().splitlines()[0])
+        assert entry["key"] == "global"
+        assert entry["value"] == {"global": "data"}
     
     async def test_concurrent_access(self, memory_manager):
         """Test thread-safe concurrent operations."""
@@ -119,11 +145,10 @@ class TestMemoryManager:
         async def reader():
             return await memory_manager.get("shared", "counter")
         
-        # Run concurrent operations
-        write_tasks = [writer(i) for i in range(10)]
-        read_tasks = [reader() for _ in range(5)]
-        
-        results = await asyncio.gather(*write_tasks, *read_tasks)
+        # Run concurrent operations (asyncio.TaskGroup needs 3.11; we target 3.10)
+        await asyncio.gather(
+            *(writer(i) for i in range(10)), *(reader() for _ in range(5))
+        )
         
         # Verify final value is one of the written values
         final_value = await memory_manager.get("shared", "counter")
@@ -202,9 +227,7 @@ class TestMemoryManager:
         
         # Verify file contains all entries
         shared_file = Path(temp_memory_dir) / "shared_updated_key.jsonl"
-        with open(shared_file, 'r') as f:
-            lines = f.readlines()
-            assert len(lines) == 3  # All writes were appended
+        assert len(_read_lines(shared_file)) == 3  # All writes were appended
     
     async def test_corrupted_file_handling(self, memory_manager, temp_memory_dir):
         """Test handling of corrupted JSONL files."""
@@ -220,17 +243,12 @@ class TestMemoryManager:
         result = await memory_manager.get("shared", "corrupted")
         assert result is None  # File exists but corrupted, so no data loaded
     
-    async def test_large_data_handling(self, memory_manager):
+    async def test_large_data_handling(self, memory_manager, large_payload):
         """Test handling of larger data structures."""
-        large_data = {
-            "items": [f"item_{i}" for i in range(1000)],
-            "metadata": {f"key_{i}": f"value_{i}" for i in range(100)}
-        }
-        
-        await memory_manager.set("shared", "large_data", large_data)
+        await memory_manager.set("shared", "large_data", large_payload)
         result = await memory_manager.get("shared", "large_data")
         
-        assert result == large_data
+        assert result == large_payload
         assert len(result["items"]) == 1000
         assert len(result["metadata"]) == 100
 
@@ -239,14 +257,26 @@ class TestMemoryManager:
 class TestMemoryAPI:
     """Test memory API endpoints."""
     
-    @pytest.fixture
+    @pytest.fixture(scope="class")
     def mock_memory_manager(self):
-        """Mock memory manager for API tests."""
+        """Mock memory manager for API tests, patched in once per class."""
         # Import the module first to ensure it's loaded
         import generated.memory_router
-        with patch.object(generated.memory_router, 'memory_manager') as mock:
+        mock = MagicMock(spec=MemoryManager)
+        mock.get = AsyncMock()
+        mock.set = AsyncMock()
+        mock.flush = AsyncMock()
+        with patch.object(generated.memory_router, 'memory_manager', mock):
             yield mock
     
+    @pytest.fixture(autouse=True)
+    def _reset_mock_memory_manager(self, mock_memory_manager):
+        """Give each test a clean mock: no calls, return values or replaced methods."""
+        mock_memory_manager.reset_mock(return_value=True, side_effect=True)
+        mock_memory_manager.get = AsyncMock()
+        mock_memory_manager.set = AsyncMock()
+        mock_memory_manager.flush = AsyncMock()
+    
     async def test_get_memory_success(self, mock_memory_manager):
         """Test successful memory retrieval via API."""
         from generated.memory_router import get_memory
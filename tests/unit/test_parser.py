@@ -1,18 +1,38 @@
 """Unit tests for BMAD Markdown parser."""
 
+import re
+import sys
 from pathlib import Path
-from tempfile import TemporaryDirectory
 
 import pytest
+import yaml
 
 from scripts.parser import (
     AgentMetadata,
     ParsingError,
+    _parse_simple_yaml,
     parse_agents_directory,
+    parse_agents_directory_async,
     parse_front_matter,
     parse_markdown_file,
+    parse_markdown_source,
 )
 
+# Error matchers, compiled once for the whole module
+RE_MEMORY_SCOPE = re.compile("memory_scope must be")
+RE_ID_REQUIRED = re.compile("Agent id is required")
+RE_INVALID_YAML = re.compile("Invalid YAML")
+RE_CANNOT_READ = re.compile("Cannot read file")
+RE_PARSING_FAILED = re.compile("Parsing failed")
+RE_NO_DIRECTORY = re.compile("Directory does not exist")
+RE_NOT_DIRECTORY = re.compile("Path is not a directory")
+
+
+@pytest.fixture(scope="session")
+def tmp_root(tmp_path_factory):
+    """Session-wide scratch root for tests that need files on disk."""
+    return tmp_path_factory.mktemp("parser_tests")
+
 
 class TestAgentMetadata:
     """Test AgentMetadata model validation."""
@@ -43,16 +63,33 @@ class TestAgentMetadata:
         assert metadata.wait_for == {"docs": [], "agents": []}
         assert metadata.parallel is False
 
+    def test_default_wait_for_not_shared(self):
+        """Test each instance gets its own default wait_for lists."""
+        first = AgentMetadata(id="first")
+        first.wait_for["docs"].append("prd.md")
+
+        assert AgentMetadata(id="second").wait_for == {"docs": [], "agents": []}
+
     def test_invalid_memory_scope(self):
         """Test validation fails for invalid memory scope."""
-        with pytest.raises(ValueError, match="memory_scope must be"):
+        with pytest.raises(ValueError, match=RE_MEMORY_SCOPE):
             AgentMetadata(id="test", memory_scope="invalid")
 
     def test_empty_id_fails(self):
         """Test validation fails for empty id."""
-        with pytest.raises(ValueError, match="Agent id is required"):
+        with pytest.raises(ValueError, match=RE_ID_REQUIRED):
             AgentMetadata(id="")
 
+    def test_scope_and_tools_interned(self):
+        """Test memory_scope and tool names are interned strings."""
+        metadata = AgentMetadata(
+            id="test",
+            memory_scope="".join(["sha", "red"]),
+            tools=["".join(["sea", "rch"])],
+        )
+        assert metadata.memory_scope is sys.intern("shared")
+        assert metadata.tools[0] is sys.intern("search")
+
     def test_whitespace_id_trimmed(self):
         """Test id gets trimmed of whitespace."""
         metadata = AgentMetadata(id="  test_agent  ")
@@ -120,6 +157,62 @@ description: Test
         assert metadata == {}
         assert remaining.strip() == content.strip()
 
+    def test_parse_repeated_front_matter_cached(self):
+        """Test repeated front matter is served from cache as independent copies."""
+        content = """---
+id: cached_agent
+tools: [search]
+---
+
+# Cached
+"""
+        parse_front_matter.cache_clear()
+        first, _ = parse_front_matter(content)
+        first["tools"].append("write")
+        second, _ = parse_front_matter(content)
+
+        assert second["tools"] == ["search"]
+        assert parse_front_matter.cache_info().hits == 1
+
+    @pytest.mark.parametrize("yaml_content", [
+        "id: agent\ndescription: Test agent for parsing\ntools: [search, write]",
+        "parallel: false\nmemory_scope: shared\ntools: []",
+        "id: a\nid: b",
+        "",
+    ])
+    def test_simple_yaml_fast_path_matches_pyyaml(self, yaml_content):
+        """Test the restricted-subset fast path agrees with PyYAML."""
+        assert _parse_simple_yaml(yaml_content) == (yaml.safe_load(yaml_content) or {})
+
+    @pytest.mark.parametrize("yaml_content", [
+        "description: |\n  block",
+        "tools:\n  - search",
+        "enabled: yes",
+        "count: 3",
+        "memory_scope: shared:team",
+        "name: 'quoted'",
+        "on: deploy",
+        "yes: value",
+        "No: value",
+        "True: value",
+        "null: value",
+    ])
+    def test_simple_yaml_fast_path_defers(self, yaml_content):
+        """Test anything outside the simple subset is left to PyYAML."""
+        assert _parse_simple_yaml(yaml_content) is None
+
+    @pytest.mark.parametrize("content", [
+        "---\nid: edge\n---",
+        "---\nid: edge\n  ---  \n# Body",
+        "---\r\nid: edge\r\n---\r\n# Body",
+    ])
+    def test_parse_closing_delimiter_variants(self, content):
+        """Test closing delimiters at EOF, padded with blanks, or CRLF-terminated."""
+        metadata, remaining = parse_front_matter(content)
+
+        assert metadata == {"id": "edge"}
+        assert remaining in ("", "# Body")
+
     def test_parse_invalid_yaml(self):
         """Test content with invalid YAML in front matter."""
         content = """---
@@ -129,7 +222,7 @@ invalid_yaml: [unclosed list
 
 # Content
 """
-        with pytest.raises(ParsingError, match="Invalid YAML"):
+        with pytest.raises(ParsingError, match=RE_INVALID_YAML):
             parse_front_matter(content)
 
 
@@ -151,43 +244,71 @@ parallel: false
 You are an expert analyst...
 """
 
-        with TemporaryDirectory() as temp_dir:
-            file_path = Path(temp_dir) / "analyst.md"
-            file_path.write_text(content, encoding="utf-8")
-
-            metadata, prompt = parse_markdown_file(file_path)
+        metadata, prompt = parse_markdown_source(content.encode("utf-8"), "analyst")
 
-            assert metadata.id == "analyst"
-            assert metadata.description == "Analyzes requirements"
-            assert metadata.tools == ["search", "read"]
-            assert metadata.memory_scope == "shared"
-            assert metadata.parallel is False
-            assert prompt.startswith("# Analyst Agent")
+        assert metadata.id == "analyst"
+        assert metadata.description == "Analyzes requirements"
+        assert metadata.tools == ["search", "read"]
+        assert metadata.memory_scope == "shared"
+        assert metadata.parallel is False
+        assert prompt.startswith("# Analyst Agent")
 
-    def test_parse_file_no_front_matter(self):
+    def test_parse_file_no_front_matter(self, tmp_path):
         """Test parsing file without front matter uses filename as id."""
         content = """# Developer Agent
 
 You are a developer...
 """
 
-        with TemporaryDirectory() as temp_dir:
-            file_path = Path(temp_dir) / "developer.md"
-            file_path.write_text(content, encoding="utf-8")
+        file_path = tmp_path / "developer.md"
+        file_path.write_text(content, encoding="utf-8")
+
+        metadata, prompt = parse_markdown_file(file_path)
+
+        assert metadata.id == "developer"
+        assert metadata.description == ""
+        assert prompt.startswith("# Developer Agent")
 
-            metadata, prompt = parse_markdown_file(file_path)
+    @pytest.mark.parametrize("newline", ["\r\n", "\r"])
+    def test_parse_file_crlf_and_cr_newlines(self, tmp_path, newline):
+        """Test Windows (CRLF) and old Mac (CR) files give the same result as LF."""
+        lines = [
+            "---", "id: analyst", "description: Analyst", "---",
+            "", "# Title", "Line two",
+        ]
+        file_path = tmp_path / "analyst.md"
+        file_path.write_bytes(newline.join(lines).encode("utf-8"))
 
-            assert metadata.id == "developer"
-            assert metadata.description == ""
-            assert prompt.startswith("# Developer Agent")
+        metadata, prompt = parse_markdown_file(file_path)
+
+        assert metadata.description == "Analyst"
+        assert prompt == "# Title\nLine two"
 
     def test_parse_nonexistent_file(self):
         """Test parsing nonexistent file raises error."""
         file_path = Path("/nonexistent/path/file.md")
 
-        with pytest.raises(ParsingError, match="Cannot read file"):
+        with pytest.raises(ParsingError, match=RE_CANNOT_READ):
+            parse_markdown_file(file_path)
+
+    def test_parse_file_invalid_utf8(self, tmp_path):
+        """Test a file that is not valid UTF-8 raises ParsingError."""
+        file_path = tmp_path / "binary.md"
+        file_path.write_bytes(b"---\nid: binary\n---\n\xff\xfe")
+
+        with pytest.raises(ParsingError, match=RE_PARSING_FAILED):
             parse_markdown_file(file_path)
 
+    def test_parse_file_with_invalid_yaml_names_file(self):
+        """Test YAML errors are reported against the source they came from."""
+        content = "---\nid: broken\ntools: [unclosed\n---\n"
+
+        with pytest.raises(ParsingError, match=RE_INVALID_YAML) as exc_info:
+            parse_markdown_source(content, "broken", "agents/broken.md")
+
+        assert exc_info.value.file == "agents/broken.md"
+        assert isinstance(exc_info.value.__cause__, yaml.YAMLError)
+
     def test_parse_file_with_validation_error(self):
         """Test parsing file with invalid metadata."""
         content = """---
@@ -198,18 +319,21 @@ memory_scope: invalid
 # Content
 """
 
-        with TemporaryDirectory() as temp_dir:
-            file_path = Path(temp_dir) / "invalid.md"
-            file_path.write_text(content, encoding="utf-8")
-
-            with pytest.raises(ParsingError, match="Parsing failed"):
-                parse_markdown_file(file_path)
+        with pytest.raises(ParsingError, match=RE_PARSING_FAILED):
+            parse_markdown_source(content.encode("utf-8"), "invalid")
 
 
 class TestParseAgentsDirectory:
     """Test parsing entire agents directory."""
 
-    def test_parse_valid_directory(self):
+    @pytest.fixture
+    def dir_path(self, tmp_root, request):
+        """Fresh directory for this test under the session-scoped root."""
+        path = tmp_root / request.node.name
+        path.mkdir()
+        return path
+
+    def test_parse_valid_directory(self, dir_path):
         """Test parsing directory with valid agent files."""
 
         files = {
@@ -235,69 +359,59 @@ Simple agent without front matter.
 """,
         }
 
-        with TemporaryDirectory() as temp_dir:
-            dir_path = Path(temp_dir)
-
-            for filename, content in files.items():
-                file_path = dir_path / filename
-                file_path.write_text(content, encoding="utf-8")
+        for filename, content in files.items():
+            file_path = dir_path / filename
+            file_path.write_text(content, encoding="utf-8")
 
-            agents = parse_agents_directory(dir_path)
+        agents = parse_agents_directory(dir_path)
 
-            assert len(agents) == 3
-            assert "analyst" in agents
-            assert "developer" in agents
-            assert "reviewer" in agents
+        assert len(agents) == 3
+        assert "analyst" in agents
+        assert "developer" in agents
+        assert "reviewer" in agents
 
-            # Check analyst metadata
-            analyst_meta, analyst_prompt = agents["analyst"]
-            assert analyst_meta.description == "Analyzes requirements"
-            assert analyst_meta.tools == ["search"]
+        # Check analyst metadata
+        analyst_meta, analyst_prompt = agents["analyst"]
+        assert analyst_meta.description == "Analyzes requirements"
+        assert analyst_meta.tools == ["search"]
 
-            # Check reviewer uses filename as id
-            reviewer_meta, _ = agents["reviewer"]
-            assert reviewer_meta.id == "reviewer"
-            assert reviewer_meta.description == ""
+        # Check reviewer uses filename as id
+        reviewer_meta, _ = agents["reviewer"]
+        assert reviewer_meta.id == "reviewer"
+        assert reviewer_meta.description == ""
 
-    def test_parse_empty_directory(self):
+    def test_parse_empty_directory(self, dir_path):
         """Test parsing empty directory returns empty dict."""
-        with TemporaryDirectory() as temp_dir:
-            dir_path = Path(temp_dir)
-
-            agents = parse_agents_directory(dir_path)
+        agents = parse_agents_directory(dir_path)
 
-            assert agents == {}
+        assert agents == {}
 
-    def test_parse_directory_no_md_files(self):
+    def test_parse_directory_no_md_files(self, dir_path):
         """Test parsing directory with no .md files."""
-        with TemporaryDirectory() as temp_dir:
-            dir_path = Path(temp_dir)
+        # Create some non-md files
+        (dir_path / "readme.txt").write_text("Not markdown")
+        (dir_path / "config.yaml").write_text("key: value")
 
-            # Create some non-md files
-            (dir_path / "readme.txt").write_text("Not markdown")
-            (dir_path / "config.yaml").write_text("key: value")
+        agents = parse_agents_directory(dir_path)
 
-            agents = parse_agents_directory(dir_path)
-
-            assert agents == {}
+        assert agents == {}
 
     def test_parse_nonexistent_directory(self):
         """Test parsing nonexistent directory raises error."""
         dir_path = Path("/nonexistent/directory")
 
-        with pytest.raises(ParsingError, match="Directory does not exist"):
+        with pytest.raises(ParsingError, match=RE_NO_DIRECTORY):
             parse_agents_directory(dir_path)
 
-    def test_parse_file_instead_of_directory(self):
+    def test_parse_file_instead_of_directory(self, dir_path):
         """Test parsing file instead of directory raises error."""
-        with TemporaryDirectory() as temp_dir:
-            file_path = Path(temp_dir) / "not_a_dir.txt"
-            file_path.write_text("content")
+        file_path = dir_path / "not_a_dir.txt"
+        file_path.write_text("content")
 
-            with pytest.raises(ParsingError, match="Path is not a directory"):
-                parse_agents_directory(file_path)
+        with pytest.raises(ParsingError, match=RE_NOT_DIRECTORY):
+            parse_agents_directory(file_path)
 
-    def test_parse_directory_with_duplicate_ids(self):
+    def test_parse_directory_with_duplicate_ids(self, dir_path):
         """Test parsing directory with duplicate agent IDs."""
 
         files = {
@@ -317,20 +431,17 @@ description: Second agent
 """,
         }
 
-        with TemporaryDirectory() as temp_dir:
-            dir_path = Path(temp_dir)
-
-            for filename, content in files.items():
-                file_path = dir_path / filename
-                file_path.write_text(content, encoding="utf-8")
+        for filename, content in files.items():
+            file_path = dir_path / filename
+            file_path.write_text(content, encoding="utf-8")
 
-            # Should not fail but log warning
-            agents = parse_agents_directory(dir_path)
+        # Should not fail but log warning
+        agents = parse_agents_directory(dir_path)
 
-            assert len(agents) == 1  # Second one overwrites first
-            assert agents["duplicate"][0].description == "Second agent"
+        assert len(agents) == 1  # Second one overwrites first
+        assert agents["duplicate"][0].description == "Second agent"
 
-    def test_parse_directory_with_invalid_file(self):
+    def test_parse_directory_with_invalid_file(self, dir_path):
         """Test parsing directory continues with invalid files."""
 
         files = {
@@ -349,18 +460,66 @@ memory_scope: invalid
 """,
         }
 
-        with TemporaryDirectory() as temp_dir:
-            dir_path = Path(temp_dir)
+        for filename, content in files.items():
+            file_path = dir_path / filename
+            file_path.write_text(content, encoding="utf-8")
+
+        # Should continue parsing valid files
+        agents = parse_agents_directory(dir_path)
+
+        assert len(agents) == 1
+        assert "valid_agent" in agents
+
+    def test_parse_directory_many_files(self, dir_path):
+        """Test larger directories with a failing file keep every valid agent."""
+        for i in range(8):
+            (dir_path / f"agent{i}.md").write_text(
+                f"---\nid: agent{i}\ndescription: Agent {i}\n---\n\n# Agent {i}\n",
+                encoding="utf-8",
+            )
+        (dir_path / "broken.md").write_text(
+            '---\nid: ""\nmemory_scope: invalid\n---\n', encoding="utf-8"
+        )
+
+        agents = parse_agents_directory(dir_path)
+
+        assert sorted(agents) == [f"agent{i}" for i in range(8)]
+        assert agents["agent5"][0].description == "Agent 5"
+        assert agents["agent5"][1].startswith("# Agent 5")
+
+    def test_parse_directory_crlf_and_cr_newlines(self, dir_path):
+        """Test Windows (CRLF) and old Mac (CR) line endings parse like LF."""
+        (dir_path / "crlf.md").write_bytes(
+            b"---\r\nid: crlf\r\ndescription: CRLF agent\r\n---\r\n"
+            b"\r\n# Title\r\nLine two"
+        )
+        (dir_path / "cr.md").write_bytes(
+            b"---\rid: cr\rdescription: CR agent\r---\r\r# Title\rLine two"
+        )
+
+        agents = parse_agents_directory(dir_path)
+
+        assert agents["crlf"][0].description == "CRLF agent"
+        assert agents["crlf"][1] == "# Title\nLine two"
+        assert agents["cr"][0].description == "CR agent"
+        assert agents["cr"][1] == "# Title\nLine two"
 
-            for filename, content in files.items():
-                file_path = dir_path / filename
-                file_path.write_text(content, encoding="utf-8")
 
-            # Should continue parsing valid files
-            agents = parse_agents_directory(dir_path)
+    async def test_parse_directory_async(self, dir_path):
+        """Test the async variant matches the sync parser."""
+        (dir_path / "analyst.md").write_text(
+            "---\nid: analyst\ntools: [search]\n---\n\n# Analyst\n", encoding="utf-8"
+        )
+        (dir_path / "reviewer.md").write_text("# Reviewer\n", encoding="utf-8")
+        (dir_path / "invalid.md").write_text(
+            '---\nid: ""\nmemory_scope: invalid\n---\n', encoding="utf-8"
+        )
 
-            assert len(agents) == 1
-            assert "valid_agent" in agents
+        agents = await parse_agents_directory_async(dir_path)
+
+        assert agents == parse_agents_directory(dir_path)
+        assert sorted(agents) == ["analyst", "reviewer"]
+        assert agents["analyst"][0].tools == ["search"]
 
 
 class TestEdgeCases:
@@ -378,27 +537,33 @@ description: Agent with émojis 🤖 and ünïcödé
 This agent handles émojis 🚀 and special characters: àáâãäåæçèéêë
 """
 
-        with TemporaryDirectory() as temp_dir:
-            file_path = Path(temp_dir) / "unicode.md"
-            file_path.write_text(content, encoding="utf-8")
+        metadata, prompt = parse_markdown_source(content.encode("utf-8"), "unicode")
 
-            metadata, prompt = parse_markdown_file(file_path)
-
-            assert "émojis 🤖" in metadata.description
-            assert "🚀" in prompt
+        assert "émojis 🤖" in metadata.description
+        assert "🚀" in prompt
 
     def test_very_large_file(self):
         """Test parsing very large file doesn't fail."""
         large_content = "# Large Agent\n\n" + "This is content. " * 10000
 
-        with TemporaryDirectory() as temp_dir:
-            file_path = Path(temp_dir) / "large.md"
-            file_path.write_text(large_content, encoding="utf-8")
+        metadata, prompt = parse_markdown_source(large_content.encode("utf-8"), "large")
+
+        assert metadata.id == "large"
+        assert len(prompt) > 100000
+
+    def test_very_large_file_on_disk(self, tmp_path):
+        """Test large files (decoded via mmap) parse the same as small ones."""
+        file_path = tmp_path / "large.md"
+        file_path.write_text(
+            "---\nid: big\n---\n\n# Large Agent 🚀\n\n" + "This is content. " * 10000,
+            encoding="utf-8",
+        )
 
-            metadata, prompt = parse_markdown_file(file_path)
+        metadata, prompt = parse_markdown_file(file_path)
 
-            assert metadata.id == "large"
-            assert len(prompt) > 100000
+        assert metadata.id == "big"
+        assert prompt.startswith("# Large Agent 🚀")
+        assert len(prompt) > 100000
 
     def test_complex_yaml_structure(self):
         """Test parsing complex YAML front matter."""
@@ -428,13 +593,9 @@ custom_field: "Should be ignored in validation but preserved"
 Content here.
 """
 
-        with TemporaryDirectory() as temp_dir:
-            file_path = Path(temp_dir) / "complex.md"
-            file_path.write_text(content, encoding="utf-8")
-
-            metadata, prompt = parse_markdown_file(file_path)
+        metadata, prompt = parse_markdown_source(content.encode("utf-8"), "complex")
 
-            assert "Multi-line description" in metadata.description
-            assert "complex_tool" in metadata.tools
-            assert "document with spaces.md" in metadata.wait_for["docs"]
-            assert metadata.parallel is True
+        assert "Multi-line description" in metadata.description
+        assert "complex_tool" in metadata.tools
+        assert "document with spaces.md" in metadata.wait_for["docs"]
+        assert metadata.parallel is True
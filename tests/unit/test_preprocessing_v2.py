@@ -28,7 +28,10 @@ from validate_preprocessing import (
     validate_against_schema,
     validate_file_references,
     validate_agent_dependencies,
-    auto_fix_common_issues
+    auto_fix_common_issues,
+    _get_validator,
+    _VALIDATOR_CACHE,
+    _VALIDATOR_CACHE_SIZE,
 )
 
 
@@ -345,6 +348,26 @@ class TestSchemaValidation:
         agent_data = {"id": "test", "memory_scope": "invalid_scope"}
         result = validate_against_schema(agent_data, v2_schema)
         assert not result.success
+    
+    def test_load_schema_cached(self, v2_schema):
+        """Test the schema is read once and shared per version."""
+        assert load_schema("2.0") is v2_schema
+    
+    def test_validator_reused_for_same_schema(self, v2_schema):
+        """Test the compiled validator is built once per schema object."""
+        validator = _get_validator(v2_schema)
+        
+        assert validate_against_schema({"id": "first"}, v2_schema).success
+        assert not validate_against_schema({"id": "123invalid"}, v2_schema).success
+        assert _get_validator(v2_schema) is validator
+    
+    def test_validator_cache_is_bounded(self, v2_schema):
+        """Test the validator cache evicts least recently used schemas."""
+        _get_validator(v2_schema)
+        for _ in range(_VALIDATOR_CACHE_SIZE + 10):
+            _get_validator({"type": "object"})
+        
+        assert len(_VALIDATOR_CACHE) <= _VALIDATOR_CACHE_SIZE
 
 
 class TestFileReferenceValidation: